@@ -1,90 +1,62 @@
 import matplotlib.pyplot as plt
+import sys
 import numpy as np
-import requests
-import re
+from genomic_core import configure_cache, get_junction_arrays, plot_coverage
 
-def parse_genomic_coordinate(genomic_coordinate): 
-    match = re.match(r'^(chr\d+):(\d+)-(\d+)_(\S+)$', genomic_coordinate)
-    if match:
-        chromosome = match.group(1)
-        start = match.group(2)
-        end = match.group(3)
-        strand = match.group(4)
-        return chromosome, int(start), int(end), strand
-    else:
-        print("Invalid genomic coordinate format")
-        return None
+configure_cache("--no-cache" not in sys.argv)
 
-def retrieve_junction_data(genomic_coordinate):
-    chromosome, start, end, strand = parse_genomic_coordinate(genomic_coordinate)
-    url = f"https://snaptron.cs.jhu.edu/srav2/snaptron?regions={chromosome}:{start}-{end}&rfilter=strand:{strand}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        junctions = [line.split('\t') for line in response.text.strip().split('\n')[1:]]
-        junctions = [(int(j[3]), int(j[4]), float(j[14])) for j in junctions]
-        return junctions
-    else:
-        print("Failed to retrieve junction data from Snaptron")
-        return None
+_RNG = np.random.default_rng(0) # Generator for the placeholder sample coverages
 
-genomic_coordinate = "chr18:79930227-79930311_+" # Test Genomic Coordinate for analysis purpose 
-
-junction_data = retrieve_junction_data(genomic_coordinate)
+# Each junction contributes two points, its start and its end, both at the junction's coverage
+def _junction_points(starts, ends, coverages):
+    return np.concatenate((starts, ends)), np.tile(coverages, 2)
 
-def plot_coverage():
-    starts = [j[0] for j in junction_data]
-    ends = [j[1] for j in junction_data]
-    coverages = [j[2] for j in junction_data]
-    plt.figure(figsize=(8, 4))
-    plt.plot(starts, coverages, 'b-', label='Coverage')
-    plt.plot(ends, coverages, 'r-', label='Coverage')
-    plt.xlabel('Position')
-    plt.ylabel('Coverage')
-    plt.title(f'Snaptron Coverage Plot for {genomic_coordinate}')
-    plt.legend()
-    plt.show()
-
-def plot_junction_position():
-    positions = np.array([j[0] for j in junction_data] + [j[1] for j in junction_data])
-    coverages = np.array([j[2] for j in junction_data] * 2)
-    plt.figure(figsize=(8, 4))
-    plt.scatter(positions, coverages, color='b', marker='o', label='Junctions')
-    plt.xlabel('Position')
-    plt.ylabel('Coverage')
-    plt.title(f'Junction Position Plot for {genomic_coordinate}')
-    plt.legend()
-    plt.show()
+genomic_coordinate = "chr18:79930227-79930311_+" # Test Genomic Coordinate for analysis purpose 
 
-def plot_junction_heatmap():
-    positions = np.array([j[0] for j in junction_data] + [j[1] for j in junction_data])
-    coverages = np.array([j[2] for j in junction_data] * 2)
-    plt.figure(figsize=(8, 4))
-    plt.hexbin(positions, coverages, gridsize=20, cmap='viridis')
-    plt.colorbar(label='Density')
-    plt.xlabel('Position')
-    plt.ylabel('Coverage')
-    plt.title(f'Junction Coverage Heatmap for {genomic_coordinate}')
-    plt.show()
+def plot_junction_position(ax, starts, ends, coverages, genomic_coordinate):
+    positions, coverages = _junction_points(starts, ends, coverages)
+    ax.scatter(positions, coverages, color='b', marker='o', label='Junctions')
+    ax.set_xlabel('Position')
+    ax.set_ylabel('Coverage')
+    ax.set_title(f'Junction Position Plot for {genomic_coordinate}')
+    ax.legend()
+
+def plot_junction_heatmap(ax, starts, ends, coverages, genomic_coordinate):
+    positions, coverages = _junction_points(starts, ends, coverages)
+    counts, x_edges, y_edges = np.histogram2d(positions, coverages, bins=20)
+    image = ax.imshow(counts.T, origin='lower', extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+                      aspect='auto', cmap='viridis')
+    ax.figure.colorbar(image, ax=ax, label='Density')
+    ax.set_xlabel('Position')
+    ax.set_ylabel('Coverage')
+    ax.set_title(f'Junction Coverage Heatmap for {genomic_coordinate}')
 
 def plot_read_alignment():
     print("Read Alignment Plot is not implemented") # lack of bam file
 
-def plot_comparative_analysis():
-    sample1_coverage = np.random.randint(10, 50, size=len(junction_data))
-    sample2_coverage = np.random.randint(10, 50, size=len(junction_data))
+def plot_comparative_analysis(ax, starts):
+    num_junctions = len(starts)
+    sample1_coverage, sample2_coverage = _RNG.integers(10, 50, size=(2, num_junctions), dtype=np.int32)
     
-    plt.figure(figsize=(8, 4))
-    plt.plot(sample1_coverage, 'b-', label='Sample 1 Coverage')
-    plt.plot(sample2_coverage, 'r-', label='Sample 2 Coverage')
-    plt.xlabel('Junction Index')
-    plt.ylabel('Coverage')
-    plt.title('Comparative Coverage Analysis')
-    plt.legend()
-    plt.show()
+    ax.plot(sample1_coverage, 'b-', label='Sample 1 Coverage')
+    ax.plot(sample2_coverage, 'r-', label='Sample 2 Coverage')
+    ax.set_xlabel('Junction Index')
+    ax.set_ylabel('Coverage')
+    ax.set_title('Comparative Coverage Analysis')
+    ax.legend()
+
+# Junction data is fetched once and passed to every plot
+junction_arrays = get_junction_arrays(genomic_coordinate)
+
+# All plots share one figure instead of allocating a new canvas per plot
+fig, axs = plt.subplots(2, 2, figsize=(16, 8))
 
 plot_read_alignment()
-plot_comparative_analysis()
+plot_comparative_analysis(axs[0, 0], junction_arrays[0])
+
+plot_coverage(axs[0, 1], *junction_arrays, genomic_coordinate)
+plot_junction_position(axs[1, 0], *junction_arrays, genomic_coordinate)
+plot_junction_heatmap(axs[1, 1], *junction_arrays, genomic_coordinate)
 
-plot_coverage()
-plot_junction_position()
-plot_junction_heatmap()
+plt.tight_layout()
+plt.show()
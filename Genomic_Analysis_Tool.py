@@ -9,90 +9,18 @@
 ####################################################
 
 import sys
-import requests
-import re
-import pyBigWig
+from genomic_core import (configure_cache, get_junction_arrays, parse_junctions, identify_exon_edges,
+                          measure_transcription_abundance, retrieve_junction_data)
 
-# Function to parse genomic coordinates
-def parse_genomic_coordinate(genomic_coordinate):
-    # Using regular expression to match the genomic coordinate pattern
-    match = re.match(r'^(chr\d+):(\d+)-(\d+)_(\S+)$', genomic_coordinate)
-    if match:
-        # Extracting chromosome, start, end, and strand from the match
-        chromosome = match.group(1)  # Chromosome identifier (e.g., "chr1")
-        start = match.group(2)       # Start position of the genomic region
-        end = match.group(3)         # End position of the genomic region
-        strand = match.group(4)      # Strand orientation (e.g., "+" or "-")
-        return chromosome, int(start), int(end), strand
-    else:
-        print("Invalid genomic coordinate format")
-        sys.exit(1)
-
-# Function to retrieve junction data from Snaptron
-def retrieve_junction_data(genomic_coordinate, filter_condition=None):
-    chromosome, start, end, strand = parse_genomic_coordinate(genomic_coordinate)
-    # Constructing the Snaptron API URL based on the genomic coordinate and optional filter condition
-    url = f"https://snaptron.cs.jhu.edu/srav2/snaptron?regions={chromosome}:{start}-{end}&rfilter=strand:{strand}"
-    if filter_condition:
-        url += f"&rfilter={filter_condition}"
-    # Sending GET request to the Snaptron API
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.text
-    else:
-        print("Failed to retrieve junction data from Snaptron")
-        sys.exit(1)
-
-# Function to identify exon edges from junction data
-def identify_exon_edges(genomic_coordinate, junction_data):
-    # Parsing junction data and extracting relevant information
-    junctions = [line.split('\t') for line in junction_data.strip().split('\n')[1:]]
-    junctions = [(int(j[3]), int(j[4]), float(j[14])) for j in junctions]
-    junctions.sort(key=lambda x: x[0])
-    exon_edges = []
-    current_start = None
-    current_end = None
-    # Identifying exon edges based on coverage threshold
-    for start, end, coverage in junctions:
-        if coverage > 0.5:
-            if current_start is None:
-                current_start = start
-            current_end = end
-        elif current_start is not None:
-            exon_edges.append((current_start, current_end))
-            current_start = None
-            current_end = None
-    if current_start is not None:
-        exon_edges.append((current_start, current_end))
-    return exon_edges
-
-# Function to measure transcription abundance from BigWig files
-def measure_transcription_abundance(genomic_coordinate, bigwig_files):
-    chromosome, start, end, _ = parse_genomic_coordinate(genomic_coordinate)
-    abundance = []
-    # Looping through each BigWig file
-    for bw_file in bigwig_files:
-        bw = pyBigWig.open(bw_file)
-        if bw is not None:
-            # Retrieving values from the BigWig file for the given genomic region
-            values = bw.values(chromosome, start, end)
-            if values:
-                # Summing up non-None values to calculate abundance
-                abundance.append(sum(filter(lambda x: x is not None, values)))
-            else:
-                abundance.append(0)
-        else:
-            print(f"Failed to open BigWig file: {bw_file}")
-            sys.exit(1)
-    return abundance
+# Passing --no-cache disables the on-disk Snaptron and BigWig result caches
+configure_cache("--no-cache" not in sys.argv)
 
 # Function to analyze genomic data based on user-selected option
 def analyze_genomic_data(genomic_coordinate, analyze_option, filter_condition=None, bigwig_file=None):
     if analyze_option == "Exon Edge Finder":
         try:
             # Retrieving junction data from Snaptron and identifying exon edges
-            junction_data = retrieve_junction_data(genomic_coordinate, filter_condition)
-            exon_edges = identify_exon_edges(genomic_coordinate, junction_data)
+            exon_edges = identify_exon_edges(*get_junction_arrays(genomic_coordinate, filter_condition))
             print("Exon Edges:")
             for edge in exon_edges:
                 print(f"Start: {edge[0]}, End: {edge[1]}")
@@ -107,7 +35,7 @@ def analyze_genomic_data(genomic_coordinate, analyze_option, filter_condition=No
             print(f"An error occurred: {str(e)}")
 
 # Main function for command-line mode
-if len(sys.argv) == 2 and sys.argv[1] == "cmd":
+if "cmd" in sys.argv[1:]:
     analyze_option = input("Choose Analysis Option (Exon Edge Finder / Genomic Abundance Analyzer): ")
     genomic_coordinate = input("Enter Genomic Coordinate (chr#:start-end_strand): ")
     if analyze_option == "Exon Edge Finder":
@@ -143,7 +71,7 @@ else:
             filter_condition = filter_entry.get()
             try:
                 junction_data = retrieve_junction_data(genomic_coordinate, filter_condition)
-                exon_edges = identify_exon_edges(genomic_coordinate, junction_data)
+                exon_edges = identify_exon_edges(*parse_junctions(junction_data))
                 result_text = "Exon Edges:\n" + "\n".join([f"Start: {edge[0]}, End: {edge[1]}" for edge in exon_edges])
                 result_label.config(text=result_text)
                 output_window = tk.Toplevel(root)
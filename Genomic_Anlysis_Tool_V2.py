@@ -1,88 +1,17 @@
 import sys
-import requests
-import re
-import pyBigWig
+from genomic_core import (configure_cache, get_junction_arrays, identify_exon_edges,
+                          measure_transcription_abundance, plot_coverage, retrieve_junction_data_batch,
+                          try_parse_genomic_coordinate)
 
-# Function to parse genomic coordinates
-def parse_genomic_coordinate(genomic_coordinate):
-    # Using regular expression to match the genomic coordinate pattern
-    match = re.match(r'^(chr\d+):(\d+)-(\d+)_(\S+)$', genomic_coordinate)
-    if match:
-        # Extracting chromosome, start, end, and strand from the match
-        chromosome = match.group(1)  # Chromosome identifier (e.g., "chr1")
-        start = match.group(2)       # Start position of the genomic region
-        end = match.group(3)         # End position of the genomic region
-        strand = match.group(4)      # Strand orientation (e.g., "+" or "-")
-        return chromosome, int(start), int(end), strand
-    else:
-        print("Invalid genomic coordinate format")
-        sys.exit(1)
-
-# Function to retrieve junction data from Snaptron
-def retrieve_junction_data(genomic_coordinate, filter_condition=None):
-    chromosome, start, end, strand = parse_genomic_coordinate(genomic_coordinate)
-    # Constructing the Snaptron API URL based on the genomic coordinate and optional filter condition
-    url = f"https://snaptron.cs.jhu.edu/srav2/snaptron?regions={chromosome}:{start}-{end}&rfilter=strand:{strand}"
-    if filter_condition:
-        url += f"&rfilter={filter_condition}"
-    # Sending GET request to the Snaptron API
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.text
-    else:
-        print("Failed to retrieve junction data from Snaptron")
-        sys.exit(1)
-
-# Function to identify exon edges from junction data
-def identify_exon_edges(genomic_coordinate, junction_data):
-    # Parsing junction data and extracting relevant information
-    junctions = [line.split('\t') for line in junction_data.strip().split('\n')[1:]]
-    junctions = [(int(j[3]), int(j[4]), float(j[14])) for j in junctions]
-    junctions.sort(key=lambda x: x[0])
-    exon_edges = []
-    current_start = None
-    current_end = None
-    # Identifying exon edges based on coverage threshold
-    for start, end, coverage in junctions:
-        if coverage > 0.5:
-            if current_start is None:
-                current_start = start
-            current_end = end
-        elif current_start is not None:
-            exon_edges.append((current_start, current_end))
-            current_start = None
-            current_end = None
-    if current_start is not None:
-        exon_edges.append((current_start, current_end))
-    return exon_edges
-
-# Function to measure transcription abundance from BigWig files
-def measure_transcription_abundance(genomic_coordinate, bigwig_files):
-    chromosome, start, end, _ = parse_genomic_coordinate(genomic_coordinate)
-    abundance = []
-    # Looping through each BigWig file
-    for bw_file in bigwig_files:
-        bw = pyBigWig.open(bw_file)
-        if bw is not None:
-            # Retrieving values from the BigWig file for the given genomic region
-            values = bw.values(chromosome, start, end)
-            if values:
-                # Summing up non-None values to calculate abundance
-                abundance.append(sum(filter(lambda x: x is not None, values)))
-            else:
-                abundance.append(0)
-        else:
-            print(f"Failed to open BigWig file: {bw_file}")
-            sys.exit(1)
-    return abundance
+# Passing --no-cache disables the on-disk Snaptron and BigWig result caches
+configure_cache("--no-cache" not in sys.argv)
 
 # Function to analyze genomic data based on user-selected option
 def analyze_genomic_data(genomic_coordinate, analyze_option, filter_condition=None, bigwig_file=None):
     if analyze_option == "Exon Edge Finder":
         try:
             # Retrieving junction data from Snaptron and identifying exon edges
-            junction_data = retrieve_junction_data(genomic_coordinate, filter_condition)
-            exon_edges = identify_exon_edges(genomic_coordinate, junction_data)
+            exon_edges = identify_exon_edges(*get_junction_arrays(genomic_coordinate, filter_condition))
             print("Exon Edges:")
             for edge in exon_edges:
                 print(f"Start: {edge[0]}, End: {edge[1]}")
@@ -97,7 +26,7 @@ def analyze_genomic_data(genomic_coordinate, analyze_option, filter_condition=No
             print(f"An error occurred: {str(e)}")
 
 # Main function for command-line mode
-if len(sys.argv) == 2 and sys.argv[1] == "cmd":
+if "cmd" in sys.argv[1:]:
     analyze_option = input("Choose Analysis Option (Exon Edge Finder / Genomic Abundance Analyzer): ")
     genomic_coordinate = input("Enter Genomic Coordinate (chr#:start-end_strand): ")
     if analyze_option == "Exon Edge Finder":
@@ -110,13 +39,13 @@ else:
     import tkinter as tk
     from tkinter import messagebox
     from tkinter import filedialog
-    import requests
-    import re
-    import sys
-    import pyBigWig
     import matplotlib.pyplot as plt
     from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-    import csv
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # Number of regions sent in each Snaptron bulk query
+    SNAPTRON_BATCH_SIZE = 25
 
         # Function to update UI based on selected analysis option
     def update_ui(selected_option):
@@ -136,65 +65,13 @@ else:
             bigwig_entry.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
 
 
-    def parse_genomic_coordinate(genomic_coordinate): 
-        match = re.match(r'^(chr\d+):(\d+)-(\d+)_(\S+)$', genomic_coordinate)
-        if match:
-            chromosome = match.group(1)
-            start = match.group(2)
-            end = match.group(3)
-            strand = match.group(4)
-            return chromosome, int(start), int(end), strand
-        else:
-            messagebox.showerror("Error", "Invalid genomic coordinate format")
-            sys.exit(1)
-
-    def retrieve_junction_data(genomic_coordinate, filter_condition=None):
-        chromosome, start, end, strand = parse_genomic_coordinate(genomic_coordinate)
-        url = f"https://snaptron.cs.jhu.edu/srav2/snaptron?regions={chromosome}:{start}-{end}&rfilter=strand:{strand}"
-        if filter_condition:
-            url += f"&rfilter={filter_condition}"
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.text
-        else:
-            messagebox.showerror("Error", "Failed to retrieve junction data from Snaptron")
-            sys.exit(1)
-
-    def identify_exon_edges(genomic_coordinate, junction_data):
-        junctions = [line.split('\t') for line in junction_data.strip().split('\n')[1:]]
-        junctions = [(int(j[3]), int(j[4]), float(j[14])) for j in junctions]
-        junctions.sort(key=lambda x: x[0])
-        exon_edges = []
-        current_start = None
-        current_end = None
-        for start, end, coverage in junctions:
-            if coverage > 0.5:
-                if current_start is None:
-                    current_start = start
-                current_end = end
-            elif current_start is not None:
-                exon_edges.append((current_start, current_end))
-                current_start = None
-                current_end = None
-        if current_start is not None:
-            exon_edges.append((current_start, current_end))
-        return exon_edges
-
-    def plot_snaptron_data(genomic_coordinate, ax):
-        junction_data = retrieve_junction_data(genomic_coordinate)
-        junctions = [line.split('\t') for line in junction_data.strip().split('\n')[1:]]
-        junctions = [(int(j[3]), int(j[4]), float(j[14])) for j in junctions]
-        starts = [j[0] for j in junctions]
-        ends = [j[1] for j in junctions]
-        coverages = [j[2] for j in junctions]
-        ax.plot(starts, coverages, 'b-', label='Coverage')
-        ax.plot(ends, coverages, 'r-', label='Coverage')
-        ax.set_xlabel('Position')
-        ax.set_ylabel('Coverage')
-        ax.set_title(f'Snaptron Coverage Plot for {genomic_coordinate}')
-        ax.legend()
-
     def analyze_genomic_data(genomic_coordinates):
+        # Validate coordinates before creating any window or figure so parse errors are reported on the Tk thread
+        for genomic_coordinate in genomic_coordinates:
+            if try_parse_genomic_coordinate(genomic_coordinate) is None:
+                messagebox.showerror("Error", f"Invalid genomic coordinate format: {genomic_coordinate}")
+                return
+
         output_window = tk.Toplevel(root)
         output_window.title("Analysis Results")
         output_text = tk.Text(output_window, wrap=tk.WORD, width=80, height=20)
@@ -208,26 +85,42 @@ else:
         num_plots = len(genomic_coordinates)
         num_cols = min(num_plots, 3)
         num_rows = (num_plots - 1) // 3 + 1
-        fig, axs = plt.subplots(num_rows, num_cols, figsize=(15, 5 * num_rows))
+        fig, axs = plt.subplots(num_rows, num_cols, figsize=(15, 5 * num_rows), squeeze=False)
+
+        # Fetch junction data in concurrent bulk queries; only network I/O runs in worker threads
+        chunks = [genomic_coordinates[i:i + SNAPTRON_BATCH_SIZE] for i in range(0, num_plots, SNAPTRON_BATCH_SIZE)]
+        junction_data_by_coordinate = {}
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {executor.submit(retrieve_junction_data_batch, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                try:
+                    junction_data_by_coordinate.update(future.result())
+                except Exception as e:
+                    output_text.insert(tk.END, f"Error retrieving junction data for {', '.join(futures[future])}: {str(e)}\n")
 
         for i, genomic_coordinate in enumerate(genomic_coordinates):
             try:
+                # Junction data is only needed for edge detection and plotting; abundance still runs without it
+                junction_arrays = junction_data_by_coordinate.get(genomic_coordinate)
+                if junction_arrays is None:
+                    output_text.insert(tk.END, f"No junction data for {genomic_coordinate}; skipping exon edges and plot\n")
                 if analyze_option.get() == "Exon Edge Finder":
-                    junction_data = retrieve_junction_data(genomic_coordinate)
-                    exon_edges = identify_exon_edges(genomic_coordinate, junction_data)
-                    
-                    output_text.insert(tk.END, f"Exon Edges for {genomic_coordinate}:\n")
-                    for edge in exon_edges:
-                        output_text.insert(tk.END, f"Start: {edge[0]}, End: {edge[1]}\n")
+                    if junction_arrays is not None:
+                        exon_edges = identify_exon_edges(*junction_arrays)
+
+                        output_text.insert(tk.END, f"Exon Edges for {genomic_coordinate}:\n")
+                        for edge in exon_edges:
+                            output_text.insert(tk.END, f"Start: {edge[0]}, End: {edge[1]}\n")
                 elif analyze_option.get() == "Genomic Abundance Analyzer":
                     file_path = filedialog.askopenfilename(title="Select BigWig file", filetypes=[("BigWig files", "*.bw")])
                     abundance = measure_transcription_abundance(genomic_coordinate, [file_path])
                     output_text.insert(tk.END, f"Transcription Abundance for {genomic_coordinate}:\n{file_path}: {abundance[0]}\n")
                 
                 # Plot Snaptron data
-                row = i // num_cols
-                col = i % num_cols
-                plot_snaptron_data(genomic_coordinate, axs[row, col])
+                if junction_arrays is not None:
+                    row = i // num_cols
+                    col = i % num_cols
+                    plot_coverage(axs[row, col], *junction_arrays, genomic_coordinate)
             except Exception as e:
                 output_text.insert(tk.END, f"Error analyzing {genomic_coordinate}: {str(e)}\n")
 
@@ -272,10 +165,12 @@ else:
     def analyze_csv_file():
         file_path = filedialog.askopenfilename(title="Select CSV file", filetypes=[("CSV files", "*.csv")])
         if file_path:
-            with open(file_path, 'r') as csvfile:
-                reader = csv.DictReader(csvfile)
-                genomic_coordinates = [f"{row['chromosome']}:{row['start']}-{row['end']}_{row['strand']}" for row in reader]
-                analyze_genomic_data(genomic_coordinates)
+            # Reading the columns with the C parser and building every coordinate in one vectorized concatenation
+            df = pd.read_csv(file_path, usecols=['chromosome', 'start', 'end', 'strand'],
+                             dtype={'chromosome': str, 'start': 'int64', 'end': 'int64', 'strand': str})
+            genomic_coordinates = (df['chromosome'] + ':' + df['start'].astype(str) + '-' + df['end'].astype(str)
+                                   + '_' + df['strand']).tolist()
+            analyze_genomic_data(genomic_coordinates)
 
     csv_button = tk.Button(root, text="Analyze CSV File", command=analyze_csv_file)
     csv_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
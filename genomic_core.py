@@ -0,0 +1,294 @@
+#####################################################
+#### Title: Genomic Core
+#### Author: Meghana Sripathi
+#### Purpose: Shared coordinate parsing, Snaptron retrieval, exon edge detection and
+####          BigWig abundance measurement and coverage plotting used by the Genomic Analysis Tool scripts,
+####          so the HTTP session and result caches are shared by every entry point.
+####
+####################################################
+
+import sys
+import requests
+import re
+import pyBigWig
+import io
+import numpy as np
+import pandas as pd
+import os
+import shelve
+import hashlib
+import contextlib
+import functools
+import atexit
+import threading
+import requests_cache
+from requests.adapters import HTTPAdapter
+
+# Numba is optional; without it exon edges are found with the NumPy implementation
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+ABUNDANCE_CACHE = "abundance_cache"
+# BigWig paths with these prefixes are remote and are never stored in the abundance cache
+_REMOTE_PREFIXES = ("http://", "https://", "ftp://")
+
+# Whether the on-disk Snaptron and BigWig result caches are used; see configure_cache
+_use_cache = True
+
+# Shared HTTP session, created on first request so importing this module has no filesystem side effects
+_session = None
+_session_lock = threading.Lock()
+
+# Function to enable or disable the on-disk caches; the entry-point scripts call this for --no-cache
+def configure_cache(enabled):
+    global _use_cache, _session
+    with _session_lock:
+        _use_cache = enabled
+        _session = None
+
+# Function to get the shared HTTP session so repeated Snaptron queries reuse pooled TCP/TLS connections
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            if _use_cache:
+                _session = requests_cache.CachedSession("snaptron_cache", expire_after=86400,
+                                                        allowable_methods=("GET", "POST"))
+            else:
+                _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+        return _session
+
+# Genomic coordinate pattern (chr#:start-end_strand), compiled once at import
+_COORD_RE = re.compile(r'^(chr\d+):(\d+)-(\d+)_(\S+)$')
+
+# Function to parse genomic coordinates, returning None for callers that report invalid input themselves
+def try_parse_genomic_coordinate(genomic_coordinate):
+    # Using regular expression to match the genomic coordinate pattern
+    match = _COORD_RE.match(genomic_coordinate)
+    if match is None:
+        return None
+    # Extracting chromosome, start, end, and strand (e.g., "chr1", 1000, 2000, "+") from the match
+    chromosome, start, end, strand = match.groups()
+    return chromosome, int(start), int(end), strand
+
+# Function to parse genomic coordinates; cached because the same coordinate string
+# is parsed again by every retrieval and abundance call
+@functools.lru_cache(maxsize=256)
+def parse_genomic_coordinate(genomic_coordinate):
+    parsed = try_parse_genomic_coordinate(genomic_coordinate)
+    if parsed is None:
+        print("Invalid genomic coordinate format")
+        sys.exit(1)
+    return parsed
+
+# Function to build the Snaptron API URL for a genomic coordinate and optional filter condition
+def _snaptron_url(genomic_coordinate, filter_condition=None):
+    chromosome, start, end, strand = parse_genomic_coordinate(genomic_coordinate)
+    url = f"https://snaptron.cs.jhu.edu/srav2/snaptron?regions={chromosome}:{start}-{end}&rfilter=strand:{strand}"
+    if filter_condition:
+        url += f"&rfilter={filter_condition}"
+    return url
+
+# Function to retrieve junction data from Snaptron
+def retrieve_junction_data(genomic_coordinate, filter_condition=None):
+    # Sending GET request to the Snaptron API
+    response = _get_session().get(_snaptron_url(genomic_coordinate, filter_condition))
+    if response.status_code == 200:
+        return response.text
+    else:
+        print("Failed to retrieve junction data from Snaptron")
+        sys.exit(1)
+
+# Read-only file object over a streamed response, so the C CSV parser can consume
+# the body chunk by chunk instead of from one fully decoded string. With the default
+# CachedSession the body is already read into memory to be stored in the cache before
+# the response is returned, so the memory saving only applies when the cache is disabled (--no-cache)
+class _ChunkReader(io.RawIOBase):
+    def __init__(self, response, chunk_size=1 << 16):
+        self._chunks = response.iter_content(chunk_size=chunk_size)
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            self._pending = next(self._chunks, None)
+            if self._pending is None:
+                self._pending = b""
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+# Function to stream junction data from Snaptron straight into start, end and coverage arrays
+def _stream_junction_data(genomic_coordinate, filter_condition=None):
+    with _get_session().get(_snaptron_url(genomic_coordinate, filter_condition), stream=True) as response:
+        if response.status_code != 200:
+            print("Failed to retrieve junction data from Snaptron")
+            sys.exit(1)
+        return parse_junctions(io.BufferedReader(_ChunkReader(response)))
+
+# Function to retrieve junction start, end and coverage arrays for many coordinates
+# with a single Snaptron bulk query
+def retrieve_junction_data_batch(genomic_coordinates, filter_condition=None):
+    regions = [parse_genomic_coordinate(c) for c in genomic_coordinates]
+    url = "https://snaptron.cs.jhu.edu/srav2/snaptron"
+    data = {"regions": "\n".join(f"{chromosome}:{start}-{end}" for chromosome, start, end, _ in regions)}
+    if filter_condition:
+        data["rfilter"] = filter_condition
+    # Parsing the streamed combined response once into one array per column
+    try:
+        with _get_session().post(url, data=data, stream=True) as response:
+            response.raise_for_status()
+            df = pd.read_csv(io.BufferedReader(_ChunkReader(response)), sep='\t', header=None, skiprows=1,
+                             usecols=[2, 3, 4, 6, 14],
+                             dtype={2: str, 3: 'int64', 4: 'int64', 6: str, 14: 'float32'})
+    except pd.errors.EmptyDataError:
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        return {genomic_coordinate: empty for genomic_coordinate in genomic_coordinates}
+    chromosomes, strands = df[2].to_numpy(), df[6].to_numpy()
+    starts, ends, coverages = df[3].to_numpy(), df[4].to_numpy(), df[14].to_numpy()
+    # Splitting the rows back out per region by chromosome, strand and overlap
+    junction_data = {}
+    for genomic_coordinate, (chromosome, start, end, strand) in zip(genomic_coordinates, regions):
+        mask = (chromosomes == chromosome) & (strands == strand) & (starts <= end) & (ends >= start)
+        junction_data[genomic_coordinate] = starts[mask], ends[mask], coverages[mask]
+    return junction_data
+
+# Function to parse Snaptron junction data (text or a readable stream) into start, end and coverage arrays
+def parse_junctions(junction_data):
+    if isinstance(junction_data, str):
+        junction_data = io.StringIO(junction_data)
+    # Reading only the start, end and coverage columns with the C parser
+    try:
+        df = pd.read_csv(junction_data, sep='\t', header=None, skiprows=1, usecols=[3, 4, 14],
+                         dtype={3: 'int64', 4: 'int64', 14: 'float32'})
+    except pd.errors.EmptyDataError:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return df[3].to_numpy(), df[4].to_numpy(), df[14].to_numpy()
+
+# Function to fetch and parse junction data once per coordinate and filter; the
+# arrays are shared between callers, so they are marked read-only
+@functools.lru_cache(maxsize=64)
+def get_junction_arrays(genomic_coordinate, filter_condition=None):
+    arrays = _stream_junction_data(genomic_coordinate, filter_condition)
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+# Function to find runs of junctions above the coverage threshold in a single compiled pass
+if njit is not None:
+    @njit(cache=True)
+    def _find_runs(starts, ends, coverages, threshold=0.5):
+        runs = np.empty((coverages.size, 2), np.int64)
+        num_runs = 0
+        in_run = False
+        for i in range(coverages.size):
+            if coverages[i] > threshold:
+                if not in_run:
+                    runs[num_runs, 0] = starts[i]
+                    in_run = True
+                runs[num_runs, 1] = ends[i]
+            elif in_run:
+                num_runs += 1
+                in_run = False
+        if in_run:
+            num_runs += 1
+        return runs[:num_runs]
+else:
+    _find_runs = None
+
+# Function to identify exon edges from parsed junction arrays
+def identify_exon_edges(starts, ends, coverages):
+    # Ordering the junctions by start position; Snaptron already returns them
+    # sorted, so the argsort only runs when that does not hold
+    if np.any(starts[1:] < starts[:-1]):
+        order = np.argsort(starts, kind='stable')
+        starts, ends, coverages = starts[order], ends[order], coverages[order]
+    if _find_runs is not None:
+        return _find_runs(starts, ends, coverages)
+    # Identifying runs of junctions above the coverage threshold; each run spans
+    # from the start of its first junction to the end of its last junction
+    edges = np.diff((coverages > 0.5).astype(np.int8), prepend=0, append=0)
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1
+    return np.column_stack((starts[run_starts], ends[run_ends])).astype(np.int64)
+
+# Function to plot Snaptron junction coverage for a genomic coordinate on a Matplotlib axis
+def plot_coverage(ax, starts, ends, coverages, genomic_coordinate):
+    ax.plot(starts, coverages, 'b-', label='Coverage')
+    ax.plot(ends, coverages, 'r-', label='Coverage')
+    ax.set_xlabel('Position')
+    ax.set_ylabel('Coverage')
+    ax.set_title(f'Snaptron Coverage Plot for {genomic_coordinate}')
+    ax.legend()
+
+# Function to get a BigWig file's modification time, or 0 when it is not a local file
+def _bigwig_mtime(bw_file):
+    return os.path.getmtime(bw_file) if os.path.exists(bw_file) else 0
+
+# Function to build the abundance cache key for a BigWig file and genomic region
+def _abundance_cache_key(bw_file, chromosome, start, end):
+    # The file modification time invalidates entries when a local BigWig file is replaced
+    mtime = _bigwig_mtime(bw_file)
+    return f"{hashlib.sha1(bw_file.encode()).hexdigest()}:{mtime}:{chromosome}:{start}:{end}"
+
+# Open BigWig handles keyed by path, each stored with the mtime it was opened at, so the
+# header and index are parsed once per file and a replaced file is reopened
+_BW_CACHE = {}
+
+# Function to open a BigWig file, reusing an already open handle when the file is unchanged
+def _open_bigwig(bw_file):
+    mtime = _bigwig_mtime(bw_file)
+    cached = _BW_CACHE.get(bw_file)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    if cached is not None:
+        # The file changed on disk since it was opened; drop the stale handle
+        cached[1].close()
+        del _BW_CACHE[bw_file]
+    # Remote files are fetched by libBigWig in fixed-size chunks; pyBigWig initialises
+    # that buffer to ~128 KiB (the recommended 1<<17) at import and open() takes no
+    # buffer argument, so there is nothing to tune per file here
+    bw = pyBigWig.open(bw_file, "r")
+    _BW_CACHE[bw_file] = (mtime, bw)
+    return bw
+
+atexit.register(lambda: [bw.close() for _, bw in _BW_CACHE.values()])
+
+# Function to sum the per-base values of a region; missing bases come back as NaN and are skipped
+def _sum_values(bw, chromosome, start, end):
+    values = bw.values(chromosome, start, end, numpy=True)
+    return 0.0 if values is None else float(np.nansum(values, dtype=np.float64))
+
+# Function to measure transcription abundance from BigWig files
+def measure_transcription_abundance(genomic_coordinate, bigwig_files):
+    chromosome, start, end, _ = parse_genomic_coordinate(genomic_coordinate)
+    abundance = []
+    with (shelve.open(ABUNDANCE_CACHE) if _use_cache else contextlib.nullcontext({})) as cache:
+        # Looping through each BigWig file
+        for bw_file in bigwig_files:
+            # Remote files have no modification time to invalidate entries on, so they are always re-read
+            cacheable = not bw_file.startswith(_REMOTE_PREFIXES)
+            key = _abundance_cache_key(bw_file, chromosome, start, end)
+            if cacheable and key in cache:
+                abundance.append(cache[key])
+                continue
+            bw = _open_bigwig(bw_file)
+            # Summing the region inside libBigWig; exact=True reads the full-resolution
+            # data instead of approximating from the zoom levels
+            try:
+                total = bw.stats(chromosome, start, end, type="sum", nBins=1, exact=True)[0]
+            except TypeError:
+                # Older pyBigWig releases have no exact= option; sum the per-base values instead
+                total = _sum_values(bw, chromosome, start, end)
+            total = 0.0 if total is None else total
+            if cacheable:
+                cache[key] = total
+            abundance.append(total)
+    return abundance
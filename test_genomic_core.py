@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+
+import genomic_core
+
+
+# The original junction-by-junction state machine, kept as the reference implementation
+def scalar_exon_edges(starts, ends, coverages):
+    junctions = sorted(zip(starts.tolist(), ends.tolist(), coverages.tolist()), key=lambda x: x[0])
+    exon_edges = []
+    current_start = None
+    current_end = None
+    for start, end, coverage in junctions:
+        if coverage > 0.5:
+            if current_start is None:
+                current_start = start
+            current_end = end
+        elif current_start is not None:
+            exon_edges.append((current_start, current_end))
+            current_start = None
+            current_end = None
+    if current_start is not None:
+        exon_edges.append((current_start, current_end))
+    return exon_edges
+
+
+def random_junctions(rng, size):
+    starts = rng.integers(0, 10_000, size=size, dtype=np.int64)
+    ends = starts + rng.integers(1, 500, size=size, dtype=np.int64)
+    coverages = rng.choice(np.array([0.0, 0.25, 0.5, 0.75, 3.0], dtype=np.float32), size=size)
+    return starts, ends, coverages
+
+
+CASES = {
+    "empty": (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)),
+    "all_below_threshold": (np.array([30, 10, 20], dtype=np.int64), np.array([40, 15, 25], dtype=np.int64),
+                            np.array([0.5, 0.1, 0.0], dtype=np.float32)),
+    "trailing_run": (np.array([10, 20, 30, 40], dtype=np.int64), np.array([15, 25, 35, 45], dtype=np.int64),
+                     np.array([0.2, 0.9, 1.0, 2.0], dtype=np.float32)),
+}
+
+
+def all_cases():
+    rng = np.random.default_rng(12345)
+    cases = list(CASES.values())
+    cases += [random_junctions(rng, size) for size in (1, 2, 10, 100, 1000)]
+    return cases
+
+
+@pytest.mark.parametrize("junctions", all_cases())
+def test_numpy_exon_edges_match_scalar(monkeypatch, junctions):
+    monkeypatch.setattr(genomic_core, "_find_runs", None, raising=False)
+    edges = genomic_core.identify_exon_edges(*junctions)
+    assert edges.shape[1:] == (2,)
+    assert [tuple(edge) for edge in edges.tolist()] == scalar_exon_edges(*junctions)
+
+
+@pytest.mark.parametrize("junctions", all_cases())
+def test_numba_exon_edges_match_scalar(junctions):
+    if genomic_core._find_runs is None:
+        pytest.skip("numba is not installed")
+    edges = genomic_core.identify_exon_edges(*junctions)
+    assert edges.shape[1:] == (2,)
+    assert [tuple(edge) for edge in edges.tolist()] == scalar_exon_edges(*junctions)
+
+
+# Builds a Snaptron junction row; only chromosome, start, end, strand and coverage are read
+def snaptron_row(chromosome, start, end, strand, coverage):
+    fields = ["I"] * 15
+    fields[2], fields[3], fields[4], fields[6], fields[14] = chromosome, str(start), str(end), strand, str(coverage)
+    return "\t".join(fields)
+
+
+SNAPTRON_HEADER = "\t".join(f"column{i}" for i in range(15))
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self._body = body.encode()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        # Deliberately small chunks so rows are split across reads
+        for i in range(0, len(self._body), 7):
+            yield self._body[i:i + 7]
+
+
+class StubSession:
+    def __init__(self, body):
+        self.body = body
+        self.posts = []
+
+    def post(self, url, data=None, stream=False):
+        self.posts.append(data)
+        return FakeResponse(self.body)
+
+
+@pytest.fixture
+def stub_session(monkeypatch):
+    def install(body):
+        session = StubSession(body)
+        monkeypatch.setattr(genomic_core, "_session", session)
+        return session
+    return install
+
+
+def test_batch_splits_rows_by_strand_and_region(stub_session):
+    body = "\n".join([
+        SNAPTRON_HEADER,
+        snaptron_row("chr1", 100, 200, "+", 3.0),
+        snaptron_row("chr1", 100, 200, "-", 7.0),
+        snaptron_row("chr2", 150, 250, "+", 1.5),
+    ]) + "\n"
+    session = stub_session(body)
+    coordinates = ["chr1:50-300_+", "chr1:50-300_-", "chr2:100-300_+", "chr3:1-1000_+"]
+    result = genomic_core.retrieve_junction_data_batch(coordinates)
+
+    assert session.posts == [{"regions": "chr1:50-300\nchr1:50-300\nchr2:100-300\nchr3:1-1000"}]
+    assert set(result) == set(coordinates)
+    for coordinate, expected in [("chr1:50-300_+", ([100], [200], [3.0])),
+                                 ("chr1:50-300_-", ([100], [200], [7.0])),
+                                 ("chr2:100-300_+", ([150], [250], [1.5])),
+                                 ("chr3:1-1000_+", ([], [], []))]:
+        starts, ends, coverages = result[coordinate]
+        assert starts.tolist() == expected[0]
+        assert ends.tolist() == expected[1]
+        assert coverages.tolist() == expected[2]
+        assert (starts.dtype, ends.dtype, coverages.dtype) == (np.int64, np.int64, np.float32)
+
+
+@pytest.mark.parametrize("body", ["", SNAPTRON_HEADER + "\n"])
+def test_batch_without_rows_returns_empty_arrays(stub_session, body):
+    stub_session(body)
+    coordinates = ["chr1:50-300_+", "chr2:100-300_-"]
+    result = genomic_core.retrieve_junction_data_batch(coordinates)
+    assert set(result) == set(coordinates)
+    for starts, ends, coverages in result.values():
+        assert len(starts) == len(ends) == len(coverages) == 0
+        assert (starts.dtype, ends.dtype, coverages.dtype) == (np.int64, np.int64, np.float32)
+
+
+def test_parse_junctions_reads_start_end_and_coverage():
+    text = "\n".join([SNAPTRON_HEADER, snaptron_row("chr1", 100, 200, "+", 3.0),
+                      snaptron_row("chr1", 300, 400, "-", 0.25)]) + "\n"
+    starts, ends, coverages = genomic_core.parse_junctions(text)
+    assert starts.tolist() == [100, 300]
+    assert ends.tolist() == [200, 400]
+    assert coverages.tolist() == [3.0, 0.25]
+    assert (starts.dtype, ends.dtype, coverages.dtype) == (np.int64, np.int64, np.float32)
+
+
+@pytest.mark.parametrize("text", ["", SNAPTRON_HEADER + "\n"])
+def test_parse_junctions_without_rows_returns_empty_arrays(text):
+    starts, ends, coverages = genomic_core.parse_junctions(text)
+    assert len(starts) == len(ends) == len(coverages) == 0
+    assert (starts.dtype, ends.dtype, coverages.dtype) == (np.int64, np.int64, np.float32)